@@ -2,20 +2,27 @@ import asyncio
 import json
 import logging
 import os
+import queue
+import re
 import sqlite3
-import struct
-from contextlib import closing
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager, suppress
 from datetime import datetime
-from math import sqrt
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Hashable, Iterator, Optional
 
 import httpx
-from fastapi import Depends, FastAPI, Header, HTTPException, Query
+import numpy as np
+import orjson
+import xxhash
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, Field
 
 OLLAMA_URL = os.environ.get("OLLAMA_EMBEDDINGS_URL", "http://localhost:11434/api/embeddings")
+OLLAMA_BATCH_URL = os.environ.get("OLLAMA_EMBED_URL", OLLAMA_URL.rsplit("/api/", 1)[0] + "/api/embed")
 EMBED_MODEL = os.environ.get("PROMPT_EMBED_MODEL", "qwen3-embedding:8b")
 ALLOWED_ORIGINS = [
     origin.strip()
@@ -30,51 +37,355 @@ BASE_DIR = Path(__file__).resolve().parent
 DB_PATH = BASE_DIR / "prompts.db"
 SEED_PATH_RAW = os.environ.get("SEED_PATH")
 SEED_PATH = Path(SEED_PATH_RAW) if SEED_PATH_RAW else None
+READ_POOL_SIZE = 4
+EMBED_BATCH_SIZE = 32
+RESPONSE_CACHE_SIZE = 1024
+PROMPT_COLUMNS = (
+    "id, name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at"
+)
 
 logger = logging.getLogger(__name__)
 
+# In-memory copy of every active prompt embedding, one L2-normalized row per
+# prompt, so semantic search is a single matrix-vector product. Writers build
+# new arrays and swap them in under EMB_LOCK; readers take a reference.
+EMB_LOCK = threading.Lock()
+EMB_IDS: np.ndarray = np.empty(0, dtype=np.int64)
+EMB_MATRIX: np.ndarray = np.empty((0, 0), dtype=np.float32)
+
+# Request-path statements are module constants so every call hands SQLite the
+# same text and hits the connection's prepared statement cache.
+SQL_GET_PROMPT = "SELECT * FROM prompts WHERE id = ? AND is_deleted = 0"
+SQL_GET_PROMPT_BY_NAME = "SELECT * FROM prompts WHERE name = ? AND is_deleted = 0"
+SQL_ACTIVE_PROMPT_ID = "SELECT id FROM prompts WHERE id = ? AND is_deleted = 0"
+SQL_INSERT_PROMPT = """
+    INSERT INTO prompts (name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, 1, 0, ?, ?)
+"""
+SQL_INSERT_VERSION = (
+    "INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at) VALUES (?, ?, ?, ?, ?)"
+)
+SQL_LIST_VERSIONS = (
+    "SELECT id, prompt_id, version, content, change_note, created_at"
+    " FROM prompt_versions WHERE prompt_id = ? ORDER BY version DESC"
+)
+SQL_GET_VERSION = """
+    SELECT pv.id, pv.prompt_id, pv.version, pv.content, pv.change_note, pv.created_at
+    FROM prompt_versions pv
+    JOIN prompts p ON p.id = pv.prompt_id
+    WHERE pv.prompt_id = ? AND pv.version = ? AND p.is_deleted = 0
+"""
+SQL_LIST_CATEGORIES = (
+    "SELECT category, COUNT(*) as count FROM prompts WHERE is_deleted = 0 GROUP BY category ORDER BY category"
+)
+SQL_UPSERT_EMBEDDING = """
+    INSERT INTO prompt_embeddings (prompt_id, embedding, content_hash, updated_at, scale)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(prompt_id) DO UPDATE SET embedding=excluded.embedding, content_hash=excluded.content_hash, updated_at=excluded.updated_at, scale=excluded.scale
+"""
+
+
+def _list_prompts_sql(category: bool, tag: bool, search: bool) -> str:
+    # Cheap indexed filters go first, in index column order; the full-text
+    # match is added last. Parameters bind in the same order.
+    clauses = ["p.is_deleted = 0"]
+    if category:
+        clauses.append("p.category = ?")
+    if tag:
+        clauses.append("p.id IN (SELECT prompt_id FROM prompt_tags WHERE tag = ?)")
+    if search:
+        clauses.append("prompts_fts MATCH ?")
+        source = "prompts_fts JOIN prompts p ON p.id = prompts_fts.rowid"
+        order = "prompts_fts.rank"
+    else:
+        source = "prompts p"
+        order = "p.updated_at DESC"
+    return f"SELECT p.* FROM {source} WHERE {' AND '.join(clauses)} ORDER BY {order}"
+
+
+# Keyed by (category, tag, search) presence.
+LIST_PROMPTS_SQL = {
+    (category, tag, search): _list_prompts_sql(category, tag, search)
+    for category in (False, True)
+    for tag in (False, True)
+    for search in (False, True)
+}
+
 
 def utc_now() -> str:
     return datetime.utcnow().isoformat()
 
 
+_wal_enabled = False
+
+
 def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
+    global _wal_enabled
+    # Pooled connections are handed between the event loop and threadpool
+    # workers, but only ever used by one of them at a time.
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    # journal_mode is stored in the database file, so it only needs setting
+    # once per process. The rest are per-connection settings.
+    if not _wal_enabled:
+        conn.execute("PRAGMA journal_mode=WAL")
+        _wal_enabled = True
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-64000")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
 
+# Connections are kept for the life of the process so SQLite's per-connection
+# page cache survives between requests. Reads check one out of a small pool;
+# all writes share a single connection, since SQLite allows one writer anyway.
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+_read_pool_opened = 0
+_pool_lock = threading.Lock()
+_writer: Optional[sqlite3.Connection] = None
+_write_lock = threading.Lock()
+
+
+@contextmanager
+def read_conn() -> Iterator[sqlite3.Connection]:
+    global _read_pool_opened
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        with _pool_lock:
+            can_open = _read_pool_opened < READ_POOL_SIZE
+            if can_open:
+                _read_pool_opened += 1
+        if can_open:
+            try:
+                conn = get_conn()
+            except BaseException:
+                # Give the slot back, or enough failed opens would leave
+                # every later read waiting on a pool that never fills.
+                with _pool_lock:
+                    _read_pool_opened -= 1
+                raise
+        else:
+            conn = _read_pool.get()
+    try:
+        yield conn
+    finally:
+        _read_pool.put(conn)
+
+
+@contextmanager
+def write_conn() -> Iterator[sqlite3.Connection]:
+    """Run the block as one BEGIN IMMEDIATE transaction on the writer.
+
+    Taking the write lock up front avoids a SQLITE_BUSY upgrade halfway
+    through, and all statements in the block share a single commit.
+    """
+    global _writer
+    with _write_lock:
+        if _writer is None:
+            _writer = get_conn()
+            _writer.isolation_level = None
+        _writer.execute("BEGIN IMMEDIATE")
+        try:
+            yield _writer
+            _writer.commit()
+        except BaseException:
+            # Also covers a failed COMMIT (disk full, I/O error), which would
+            # otherwise leave the shared writer stuck inside the transaction.
+            if _writer.in_transaction:
+                _writer.rollback()
+            raise
+        invalidate_response_cache()
+
+
+# Rendered JSON bodies for hot read routes. Any committed write clears the
+# cache and bumps the generation; a read only stores its body if no write
+# committed while it was querying, so a slow read cannot cache stale data.
+_response_cache: "OrderedDict[Hashable, bytes]" = OrderedDict()
+_cache_generation = 0
+_cache_lock = threading.Lock()
+
+
+def invalidate_response_cache() -> None:
+    global _cache_generation
+    with _cache_lock:
+        _cache_generation += 1
+        _response_cache.clear()
+
+
+def dumps_json(value: Any) -> bytes:
+    # orjson rejects integers beyond 64 bits, which prompt variables are
+    # allowed to contain; the stdlib encoder handles them exactly.
+    try:
+        return orjson.dumps(value)
+    except orjson.JSONEncodeError:
+        return json.dumps(value).encode()
+
+
+# The same fallback for bodies FastAPI renders itself.
+class FallbackORJSONResponse(ORJSONResponse):
+    def render(self, content: Any) -> bytes:
+        try:
+            return super().render(content)
+        except orjson.JSONEncodeError:
+            return json.dumps(content).encode()
+
+
+def cached_json(key: Hashable, build: Callable[[], Any]) -> Response:
+    with _cache_lock:
+        body = _response_cache.get(key)
+        if body is not None:
+            _response_cache.move_to_end(key)
+        generation = _cache_generation
+    if body is None:
+        body = dumps_json(build())
+        with _cache_lock:
+            if generation == _cache_generation:
+                _response_cache[key] = body
+                if len(_response_cache) > RESPONSE_CACHE_SIZE:
+                    _response_cache.popitem(last=False)
+    return Response(content=body, media_type="application/json")
+
+
+def close_pool() -> None:
+    global _read_pool_opened, _writer
+    with _pool_lock:
+        while True:
+            try:
+                _read_pool.get_nowait().close()
+            except queue.Empty:
+                break
+        _read_pool_opened = 0
+    with _write_lock:
+        if _writer is not None:
+            _writer.close()
+            _writer = None
+
+
 async def embed_text(text: str) -> list[float] | None:
     """Get an embedding from Ollama asynchronously. Returns None if unavailable."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            resp = await client.post(OLLAMA_URL, json={"model": EMBED_MODEL, "prompt": text})
+        resp = await app.state.ollama.post(OLLAMA_URL, json={"model": EMBED_MODEL, "prompt": text})
         resp.raise_for_status()
         return resp.json().get("embedding")
     except Exception:
         return None
 
 
-def pack_embedding(emb: list[float]) -> bytes:
-    return struct.pack(f"{len(emb)}f", *emb)
+async def embed_texts(texts: list[str]) -> list[Optional[list[float]]]:
+    """Embed several texts in one Ollama /api/embed call.
+
+    Servers without the batch endpoint get one embed_text call per text.
+    Entries are None where no embedding could be produced.
+    """
+    try:
+        resp = await app.state.ollama.post(
+            OLLAMA_BATCH_URL, json={"model": EMBED_MODEL, "input": texts}, timeout=60.0
+        )
+        if resp.status_code != 404:
+            resp.raise_for_status()
+            embeddings = resp.json().get("embeddings") or []
+            if len(embeddings) == len(texts):
+                return embeddings
+            return [None] * len(texts)
+    except Exception:
+        return [None] * len(texts)
+    return [await embed_text(text) for text in texts]
 
 
-def unpack_embedding(data: bytes) -> list[float]:
-    n = len(data) // 4
-    return list(struct.unpack(f"{n}f", data))
+def normalize(vec: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vec)
+    if norm == 0:
+        return vec
+    return vec / norm
 
 
-def cosine_similarity(a: list[float], b: list[float]) -> float:
-    dot = sum(x * y for x, y in zip(a, b))
-    na = sqrt(sum(x * x for x in a))
-    nb = sqrt(sum(x * x for x in b))
-    if na == 0 or nb == 0:
-        return 0.0
-    return dot / (na * nb)
+def quantize_embedding(emb: list[float]) -> tuple[bytes, float]:
+    """Normalize an embedding and pack it as int8 values plus one scale."""
+    vec = normalize(np.asarray(emb, dtype=np.float32))
+    peak = float(np.abs(vec).max()) if vec.size else 0.0
+    scale = peak / 127 if peak else 1.0
+    return np.round(vec / scale).astype(np.int8).tobytes(), scale
+
+
+def dequantize_embedding(blob: bytes, scale: Optional[float]) -> np.ndarray:
+    if scale is None:
+        # Rows written before quantization hold raw float32 values.
+        return np.frombuffer(blob, dtype=np.float32)
+    return np.frombuffer(blob, dtype=np.int8).astype(np.float32) * np.float32(scale)
+
+
+def load_embedding_matrix() -> None:
+    """Build the in-memory embedding matrix from stored embeddings.
+
+    The newest embedding decides the dimension; rows left over from a
+    different embedding model are skipped until they are rebuilt.
+    """
+    global EMB_IDS, EMB_MATRIX
+    with read_conn() as conn:
+        emb_rows = conn.execute(
+            """
+            SELECT e.prompt_id, e.embedding, e.scale
+            FROM prompt_embeddings e
+            JOIN prompts p ON p.id = e.prompt_id
+            WHERE p.is_deleted = 0
+            ORDER BY e.updated_at DESC
+            """
+        ).fetchall()
+
+    ids: list[int] = []
+    vecs: list[np.ndarray] = []
+    for row in emb_rows:
+        vec = dequantize_embedding(row["embedding"], row["scale"])
+        if vecs and vec.shape != vecs[0].shape:
+            continue
+        ids.append(row["prompt_id"])
+        vecs.append(normalize(vec))
+
+    with EMB_LOCK:
+        EMB_IDS = np.array(ids, dtype=np.int64)
+        EMB_MATRIX = np.vstack(vecs) if vecs else np.empty((0, 0), dtype=np.float32)
+
+
+def set_cached_embeddings(entries: list[tuple[int, np.ndarray]]) -> None:
+    """Insert or replace cached vectors, copying the matrix once per batch."""
+    global EMB_IDS, EMB_MATRIX
+    if not entries:
+        return
+    # Later entries for the same prompt win, and the last entry decides the
+    # dimension, as if the vectors had been applied one at a time.
+    dim = entries[-1][1].shape
+    latest = {prompt_id: normalize(vec) for prompt_id, vec in entries if vec.shape == dim}
+    new_ids = np.fromiter(latest.keys(), dtype=np.int64, count=len(latest))
+    new_vecs = np.vstack(list(latest.values())).astype(np.float32, copy=False)
+    with EMB_LOCK:
+        ids, matrix = EMB_IDS, EMB_MATRIX
+        if matrix.shape[1:] != dim:
+            # A new embedding model changed the dimension; older rows can no
+            # longer be compared with new queries.
+            ids, matrix = np.empty(0, dtype=np.int64), np.empty((0, dim[0]), dtype=np.float32)
+        cached = np.isin(new_ids, ids)
+        # vstack always allocates, so replacing rows below never touches the
+        # matrix that concurrent searches may still be reading.
+        matrix = np.vstack([matrix, new_vecs[~cached]])
+        if cached.any():
+            order = np.argsort(ids)
+            rows = order[np.searchsorted(ids, new_ids[cached], sorter=order)]
+            matrix[rows] = new_vecs[cached]
+        EMB_IDS, EMB_MATRIX = np.concatenate([ids, new_ids[~cached]]), matrix
+
+
+def drop_cached_embedding(prompt_id: int) -> None:
+    global EMB_IDS, EMB_MATRIX
+    with EMB_LOCK:
+        keep = EMB_IDS != prompt_id
+        EMB_IDS, EMB_MATRIX = EMB_IDS[keep], EMB_MATRIX[keep]
 
 
 def init_db() -> None:
-    with closing(get_conn()) as conn:
+    with write_conn() as conn:
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS prompts (
@@ -99,10 +410,14 @@ def init_db() -> None:
                 embedding BLOB NOT NULL,
                 content_hash TEXT NOT NULL,
                 updated_at TEXT NOT NULL,
+                scale REAL,
                 FOREIGN KEY(prompt_id) REFERENCES prompts(id)
             )
             """
         )
+        embedding_columns = {r["name"] for r in conn.execute("PRAGMA table_info(prompt_embeddings)")}
+        if "scale" not in embedding_columns:
+            conn.execute("ALTER TABLE prompt_embeddings ADD COLUMN scale REAL")
         conn.execute(
             """
             CREATE TABLE IF NOT EXISTS prompt_versions (
@@ -117,17 +432,118 @@ def init_db() -> None:
             )
             """
         )
-        conn.commit()
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prompt_tags (
+                prompt_id INTEGER NOT NULL,
+                tag TEXT NOT NULL,
+                PRIMARY KEY(prompt_id, tag),
+                FOREIGN KEY(prompt_id) REFERENCES prompts(id)
+            )
+            """
+        )
+        # prompts(name) and prompt_versions(prompt_id, version) are already
+        # covered by their UNIQUE constraints (seed_demo.py declares the
+        # same schema).
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_prompts_active_updated ON prompts(is_deleted, updated_at DESC)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_prompts_active_category ON prompts(is_deleted, category, updated_at DESC)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_prompt_tags_tag ON prompt_tags(tag, prompt_id)")
+        # Plain unicode61, not porter: fts_query turns every word into a prefix
+        # term, and a stemmed index stores "generat" for "Generator", so a
+        # half-typed "genera" would match nothing.
+        fts = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'prompts_fts'"
+        ).fetchone()
+        fts_exists = fts is not None and "porter" not in fts["sql"]
+        if fts is not None and not fts_exists:
+            # An index built with the old stemming tokenizer; the triggers
+            # reference the table by name and keep working once it is rebuilt.
+            conn.execute("DROP TABLE prompts_fts")
+        conn.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5(
+                name, title, content, tags,
+                content='prompts', content_rowid='id', tokenize='unicode61'
+            )
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_ai AFTER INSERT ON prompts BEGIN
+                INSERT INTO prompts_fts(rowid, name, title, content, tags)
+                VALUES (new.id, new.name, new.title, new.content, new.tags);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_ad AFTER DELETE ON prompts BEGIN
+                INSERT INTO prompts_fts(prompts_fts, rowid, name, title, content, tags)
+                VALUES ('delete', old.id, old.name, old.title, old.content, old.tags);
+            END
+            """
+        )
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS prompts_fts_au AFTER UPDATE OF name, title, content, tags ON prompts BEGIN
+                INSERT INTO prompts_fts(prompts_fts, rowid, name, title, content, tags)
+                VALUES ('delete', old.id, old.name, old.title, old.content, old.tags);
+                INSERT INTO prompts_fts(rowid, name, title, content, tags)
+                VALUES (new.id, new.name, new.title, new.content, new.tags);
+            END
+            """
+        )
+        if not fts_exists:
+            conn.execute("INSERT INTO prompts_fts(prompts_fts) VALUES ('rebuild')")
+        # Backfill tags for prompts written before prompt_tags existed or
+        # inserted directly (seed_demo.py). Prompts with no tags never get
+        # prompt_tags rows, so they are excluded rather than revisited on
+        # every startup.
+        untagged = conn.execute(
+            """
+            SELECT id, tags FROM prompts
+            WHERE TRIM(tags, ' ,') != '' AND id NOT IN (SELECT prompt_id FROM prompt_tags)
+            """
+        ).fetchall()
+        for row in untagged:
+            store_prompt_tags(conn, row["id"], row["tags"])
 
 
 def parse_tags(tags: str) -> list[str]:
     return [t.strip() for t in tags.split(",") if t.strip()]
 
 
+def store_prompt_tags(conn: sqlite3.Connection, prompt_id: int, tags: str) -> None:
+    """Replace the prompt_tags rows for a prompt inside the caller's transaction."""
+    conn.execute("DELETE FROM prompt_tags WHERE prompt_id = ?", (prompt_id,))
+    conn.executemany(
+        "INSERT OR IGNORE INTO prompt_tags (prompt_id, tag) VALUES (?, ?)",
+        [(prompt_id, tag) for tag in parse_tags(tags)],
+    )
+
+
+def fts_query(search: str) -> str:
+    """Turn free text into an FTS5 query: every word is a quoted prefix term."""
+    terms = search.split()
+    return " ".join('"' + term.replace('"', '""') + '"*' for term in terms)
+
+
+# orjson silently parses integers outside int64/uint64 as floats. The
+# shortest such value is a 19-digit negative below the int64 minimum, so
+# anything with a run of 19+ digits goes through the stdlib parser.
+_LONG_DIGITS = re.compile(r"\d{19}")
+
+
 def parse_variables(raw: str) -> Any:
     try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
+        if _LONG_DIGITS.search(raw):
+            return json.loads(raw)
+        return orjson.loads(raw)
+    except ValueError:
         return []
 
 
@@ -153,38 +569,33 @@ def seed_prompt_rules() -> None:
     if not SEED_PATH.exists():
         return
     content = SEED_PATH.read_text(encoding="utf-8")
+    tags = "variants, ui, design, security-tools"
     now = utc_now()
-    with closing(get_conn()) as conn:
+    with write_conn() as conn:
         existing = conn.execute(
             "SELECT id FROM prompts WHERE name = ?", ("variant-design-rules",)
         ).fetchone()
         if existing:
             return
         cur = conn.execute(
-            """
-            INSERT INTO prompts (name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at)
-            VALUES (?, ?, ?, ?, ?, ?, 1, 0, ?, ?)
-            """,
+            SQL_INSERT_PROMPT,
             (
                 "variant-design-rules",
                 "Variant Design Rules",
                 "design-rules",
-                "variants, ui, design, security-tools",
+                tags,
                 content,
-                json.dumps([]),
+                "[]",
                 now,
                 now,
             ),
         )
         prompt_id = cur.lastrowid
         conn.execute(
-            """
-            INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at)
-            VALUES (?, 1, ?, ?, ?)
-            """,
-            (prompt_id, content, "Initial import from PROMPT_RULES.md", now),
+            SQL_INSERT_VERSION,
+            (prompt_id, 1, content, "Initial import from PROMPT_RULES.md", now),
         )
-        conn.commit()
+        store_prompt_tags(conn, prompt_id, tags)
 
 
 class PromptCreate(BaseModel):
@@ -206,7 +617,10 @@ class PromptUpdate(BaseModel):
     change_note: str = "Updated prompt"
 
 
-app = FastAPI(title="Prompt Library API", version="2.0.0")
+# Routes that return prompt data hand back a FallbackORJSONResponse
+# directly. Rows come from our own database, so re-validating them against
+# an inferred response model on every request is wasted work.
+app = FastAPI(title="Prompt Library API", version="2.0.0", default_response_class=FallbackORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=ALLOWED_ORIGINS,
@@ -228,10 +642,29 @@ async def require_api_key(
         raise HTTPException(status_code=401, detail="Invalid or missing API key")
 
 
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    # Stop the embedding worker before closing what it uses, so it cannot
+    # post on a closed client or reopen the writer after close_pool().
+    worker = app.state.embed_worker
+    worker.cancel()
+    with suppress(asyncio.CancelledError):
+        await worker
+    await app.state.ollama.aclose()
+    close_pool()
+
+
 @app.on_event("startup")
 def startup() -> None:
     init_db()
     seed_prompt_rules()
+    load_embedding_matrix()
+    # One keep-alive client for every Ollama call instead of a new
+    # connection per embedding.
+    app.state.ollama = httpx.AsyncClient(
+        timeout=10.0,
+        limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=30.0),
+    )
     app.state.api_key = os.environ.get("PROMPT_LIBRARY_API_KEY")
     if app.state.api_key:
         logger.info("Prompt Library API key authentication enabled")
@@ -241,10 +674,9 @@ def startup() -> None:
 
 @app.get("/api/health")
 def health() -> dict[str, int | str]:
-    conn = get_conn()
-    total_prompts = conn.execute("SELECT COUNT(*) AS total FROM prompts").fetchone()["total"]
-    embedded_prompts = conn.execute("SELECT COUNT(*) AS total FROM prompt_embeddings").fetchone()["total"]
-    conn.close()
+    with read_conn() as conn:
+        total_prompts = conn.execute("SELECT COUNT(*) AS total FROM prompts").fetchone()["total"]
+        embedded_prompts = conn.execute("SELECT COUNT(*) AS total FROM prompt_embeddings").fetchone()["total"]
     return {
         "status": "ok",
         "embedding_model": EMBED_MODEL,
@@ -258,87 +690,58 @@ def list_prompts(
     category: Optional[str] = Query(default=None),
     tag: Optional[str] = Query(default=None),
     search: Optional[str] = Query(default=None),
-) -> dict[str, Any]:
-    query = "SELECT * FROM prompts WHERE is_deleted = 0"
-    params: list[Any] = []
-    if category:
-        query += " AND category = ?"
-        params.append(category)
-    if tag:
-        query += " AND tags LIKE ?"
-        params.append(f"%{tag}%")
-    if search:
-        query += " AND (name LIKE ? OR title LIKE ? OR content LIKE ? OR tags LIKE ?)"
-        wildcard = f"%{search}%"
-        params.extend([wildcard, wildcard, wildcard, wildcard])
-    query += " ORDER BY updated_at DESC"
+) -> FallbackORJSONResponse:
+    match = fts_query(search) if search else ""
+    query = LIST_PROMPTS_SQL[bool(category), bool(tag), bool(match)]
+    params = [value for value in (category, tag, match) if value]
 
-    with closing(get_conn()) as conn:
+    with read_conn() as conn:
         rows = conn.execute(query, params).fetchall()
         prompts = [row_to_prompt(r) for r in rows]
-    return {"prompts": prompts}
+    return FallbackORJSONResponse({"prompts": prompts})
+
+
+def fetch_prompt(sql: str, key: Any) -> dict[str, Any]:
+    with read_conn() as conn:
+        row = conn.execute(sql, (key,)).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Prompt not found")
+    return row_to_prompt(row)
 
 
 @app.get("/api/prompts/{prompt_id}")
-def get_prompt(prompt_id: int) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        row = conn.execute(
-            "SELECT * FROM prompts WHERE id = ? AND is_deleted = 0", (prompt_id,)
-        ).fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Prompt not found")
-        return row_to_prompt(row)
+def get_prompt(prompt_id: int) -> Response:
+    return cached_json(("prompt", prompt_id), lambda: fetch_prompt(SQL_GET_PROMPT, prompt_id))
 
 
 @app.get("/api/prompts/by-name/{name}")
-def get_prompt_by_name(name: str) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        row = conn.execute(
-            "SELECT * FROM prompts WHERE name = ? AND is_deleted = 0", (name,)
-        ).fetchone()
-        if not row:
-            raise HTTPException(status_code=404, detail="Prompt not found")
-        return row_to_prompt(row)
+def get_prompt_by_name(name: str) -> Response:
+    return cached_json(("prompt_name", name), lambda: fetch_prompt(SQL_GET_PROMPT_BY_NAME, name))
 
 
 @app.get("/api/prompts/{prompt_id}/versions")
-def get_versions(prompt_id: int) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        prompt = conn.execute(
-            "SELECT id FROM prompts WHERE id = ? AND is_deleted = 0", (prompt_id,)
-        ).fetchone()
+def get_versions(prompt_id: int) -> FallbackORJSONResponse:
+    with read_conn() as conn:
+        prompt = conn.execute(SQL_ACTIVE_PROMPT_ID, (prompt_id,)).fetchone()
         if not prompt:
             raise HTTPException(status_code=404, detail="Prompt not found")
-        rows = conn.execute(
-            "SELECT id, prompt_id, version, content, change_note, created_at FROM prompt_versions WHERE prompt_id = ? ORDER BY version DESC",
-            (prompt_id,),
-        ).fetchall()
-    return {"versions": [dict(r) for r in rows]}
+        rows = conn.execute(SQL_LIST_VERSIONS, (prompt_id,)).fetchall()
+    return FallbackORJSONResponse({"versions": [dict(r) for r in rows]})
 
 
 @app.get("/api/prompts/{prompt_id}/versions/{version}")
-def get_specific_version(prompt_id: int, version: int) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        row = conn.execute(
-            """
-            SELECT pv.id, pv.prompt_id, pv.version, pv.content, pv.change_note, pv.created_at
-            FROM prompt_versions pv
-            JOIN prompts p ON p.id = pv.prompt_id
-            WHERE pv.prompt_id = ? AND pv.version = ? AND p.is_deleted = 0
-            """,
-            (prompt_id, version),
-        ).fetchone()
+def get_specific_version(prompt_id: int, version: int) -> FallbackORJSONResponse:
+    with read_conn() as conn:
+        row = conn.execute(SQL_GET_VERSION, (prompt_id, version)).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Version not found")
-    return dict(row)
+    return FallbackORJSONResponse(dict(row))
 
 
 @app.post("/api/prompts/{prompt_id}/restore/{version}", dependencies=[Depends(require_api_key)])
-async def restore_version(prompt_id: int, version: int) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        prompt_row = conn.execute(
-            "SELECT * FROM prompts WHERE id = ? AND is_deleted = 0", (prompt_id,)
-        ).fetchone()
+async def restore_version(prompt_id: int, version: int) -> Response:
+    with write_conn() as conn:
+        prompt_row = conn.execute(SQL_GET_PROMPT, (prompt_id,)).fetchone()
         if not prompt_row:
             raise HTTPException(status_code=404, detail="Prompt not found")
 
@@ -353,7 +756,8 @@ async def restore_version(prompt_id: int, version: int) -> dict[str, Any]:
         now = utc_now()
         restored_content = version_row["content"]
 
-        conn.execute(
+        cur = conn.cursor()
+        cur.execute(
             """
             UPDATE prompts
             SET content = ?, current_version = ?, updated_at = ?
@@ -361,57 +765,40 @@ async def restore_version(prompt_id: int, version: int) -> dict[str, Any]:
             """,
             (restored_content, next_version, now, prompt_id),
         )
-        conn.execute(
-            "INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at) VALUES (?, ?, ?, ?, ?)",
+        cur.execute(
+            SQL_INSERT_VERSION,
             (prompt_id, next_version, restored_content, f"Restored from version {version}", now),
         )
-        conn.commit()
-
-    asyncio.create_task(
-        _embed_prompt(
-            prompt_id,
-            restored_content,
-            prompt_row["name"],
-            prompt_row["tags"],
-            prompt_row["category"],
-        )
-    )
+
+    queue_embedding(prompt_id)
     return get_prompt(prompt_id)
 
 
 @app.post("/api/prompts", dependencies=[Depends(require_api_key)])
-async def create_prompt(payload: PromptCreate) -> dict[str, Any]:
+async def create_prompt(payload: PromptCreate) -> Response:
     now = utc_now()
     tags = ", ".join(payload.tags)
-    vars_json = json.dumps(payload.variables)
-    with closing(get_conn()) as conn:
+    vars_json = dumps_json(payload.variables).decode()
+    with write_conn() as conn:
         try:
             cur = conn.execute(
-                """
-                INSERT INTO prompts (name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, 1, 0, ?, ?)
-                """,
+                SQL_INSERT_PROMPT,
                 (payload.name, payload.title, payload.category, tags, payload.content, vars_json, now, now),
             )
         except sqlite3.IntegrityError:
             raise HTTPException(status_code=409, detail="Prompt name already exists")
         prompt_id = cur.lastrowid
-        conn.execute(
-            "INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at) VALUES (?, 1, ?, ?, ?)",
-            (prompt_id, payload.content, payload.change_note, now),
-        )
-        conn.commit()
+        cur.execute(SQL_INSERT_VERSION, (prompt_id, 1, payload.content, payload.change_note, now))
+        store_prompt_tags(conn, prompt_id, tags)
 
-    asyncio.create_task(
-        _embed_prompt(prompt_id, payload.content, payload.name, tags, payload.category)
-    )
+    queue_embedding(prompt_id)
     return get_prompt(prompt_id)
 
 
 @app.put("/api/prompts/{prompt_id}", dependencies=[Depends(require_api_key)])
-async def update_prompt(prompt_id: int, payload: PromptUpdate) -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        row = conn.execute("SELECT * FROM prompts WHERE id = ? AND is_deleted = 0", (prompt_id,)).fetchone()
+async def update_prompt(prompt_id: int, payload: PromptUpdate) -> Response:
+    with write_conn() as conn:
+        row = conn.execute(SQL_GET_PROMPT, (prompt_id,)).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Prompt not found")
 
@@ -419,12 +806,13 @@ async def update_prompt(prompt_id: int, payload: PromptUpdate) -> dict[str, Any]
         category = payload.category if payload.category is not None else row["category"]
         tags = ", ".join(payload.tags) if payload.tags is not None else row["tags"]
         content = payload.content if payload.content is not None else row["content"]
-        variables = json.dumps(payload.variables) if payload.variables is not None else row["variables"]
+        variables = dumps_json(payload.variables).decode() if payload.variables is not None else row["variables"]
 
         next_version = int(row["current_version"]) + 1
         now = utc_now()
 
-        conn.execute(
+        cur = conn.cursor()
+        cur.execute(
             """
             UPDATE prompts
             SET title = ?, category = ?, tags = ?, content = ?, variables = ?, current_version = ?, updated_at = ?
@@ -432,58 +820,118 @@ async def update_prompt(prompt_id: int, payload: PromptUpdate) -> dict[str, Any]
             """,
             (title, category, tags, content, variables, next_version, now, prompt_id),
         )
-        conn.execute(
-            "INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at) VALUES (?, ?, ?, ?, ?)",
-            (prompt_id, next_version, content, payload.change_note, now),
-        )
-        conn.commit()
+        cur.execute(SQL_INSERT_VERSION, (prompt_id, next_version, content, payload.change_note, now))
+        if payload.tags is not None:
+            store_prompt_tags(conn, prompt_id, tags)
 
-    asyncio.create_task(_embed_prompt(prompt_id, content, row["name"], tags, category))
+    queue_embedding(prompt_id)
     return get_prompt(prompt_id)
 
 
 @app.delete("/api/prompts/{prompt_id}", dependencies=[Depends(require_api_key)])
 def delete_prompt(prompt_id: int) -> dict[str, bool]:
-    with closing(get_conn()) as conn:
-        row = conn.execute("SELECT id FROM prompts WHERE id = ? AND is_deleted = 0", (prompt_id,)).fetchone()
+    with write_conn() as conn:
+        row = conn.execute(SQL_ACTIVE_PROMPT_ID, (prompt_id,)).fetchone()
         if not row:
             raise HTTPException(status_code=404, detail="Prompt not found")
         conn.execute("UPDATE prompts SET is_deleted = 1, updated_at = ? WHERE id = ?", (utc_now(), prompt_id))
-        conn.commit()
+    drop_cached_embedding(prompt_id)
     return {"ok": True}
 
 
 @app.get("/api/categories")
-def list_categories() -> dict[str, Any]:
-    with closing(get_conn()) as conn:
-        rows = conn.execute(
-            "SELECT category, COUNT(*) as count FROM prompts WHERE is_deleted = 0 GROUP BY category ORDER BY category"
-        ).fetchall()
-    return {"categories": [dict(r) for r in rows]}
+def list_categories() -> Response:
+    def build() -> dict[str, Any]:
+        with read_conn() as conn:
+            rows = conn.execute(SQL_LIST_CATEGORIES).fetchall()
+        return {"categories": [dict(r) for r in rows]}
+
+    return cached_json(("categories",), build)
+
+
+def embedding_text(name: str, category: str, tags: str, content: str) -> str:
+    return f"{name} ({category}): {tags}\n\n{content}"
 
 
-async def _embed_prompt(prompt_id: int, content: str, name: str, tags: str, category: str) -> bool:
-    """Generate and store an embedding for a prompt asynchronously."""
-    import hashlib
+def content_hash(text: str) -> str:
+    return xxhash.xxh3_128_hexdigest(text.encode())
 
-    text = f"{name} ({category}): {tags}\n\n{content}"
-    content_hash = hashlib.md5(text.encode()).hexdigest()
-    emb = await embed_text(text)
-    if emb is None:
-        return False
-    blob = pack_embedding(emb)
+
+def store_embeddings(items: list[tuple[int, str, list[float]]]) -> None:
+    """Write (prompt_id, content_hash, embedding) rows and refresh the matrix."""
     now = utc_now()
-    with closing(get_conn()) as conn:
-        conn.execute(
-            """
-            INSERT INTO prompt_embeddings (prompt_id, embedding, content_hash, updated_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(prompt_id) DO UPDATE SET embedding=excluded.embedding, content_hash=excluded.content_hash, updated_at=excluded.updated_at
-            """,
-            (prompt_id, blob, content_hash, now),
+    packed = [(prompt_id, text_hash, *quantize_embedding(emb)) for prompt_id, text_hash, emb in items]
+    with write_conn() as conn:
+        conn.executemany(
+            SQL_UPSERT_EMBEDDING,
+            [(prompt_id, blob, text_hash, now, scale) for prompt_id, text_hash, blob, scale in packed],
         )
-        conn.commit()
-    return True
+    set_cached_embeddings([(prompt_id, dequantize_embedding(blob, scale)) for prompt_id, _, blob, scale in packed])
+
+
+async def embed_prompts(prompt_ids: list[int], force: bool = False) -> int:
+    """Embed the current text of the given prompts in one batch. Returns how many were stored.
+
+    Prompts whose embedded text is unchanged since their stored embedding
+    (for example a title-only edit) are skipped unless force is set.
+    """
+    placeholders = ", ".join("?" for _ in prompt_ids)
+    with read_conn() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT p.id, p.name, p.category, p.tags, p.content, e.content_hash
+            FROM prompts p
+            LEFT JOIN prompt_embeddings e ON e.prompt_id = p.id
+            WHERE p.is_deleted = 0 AND p.id IN ({placeholders})
+            """,
+            prompt_ids,
+        ).fetchall()
+
+    pending = []
+    for row in rows:
+        text = embedding_text(row["name"], row["category"], row["tags"], row["content"])
+        text_hash = content_hash(text)
+        if force or text_hash != row["content_hash"]:
+            pending.append((row["id"], text, text_hash))
+    if not pending:
+        return 0
+    embeddings = await embed_texts([text for _, text, _ in pending])
+
+    items = []
+    for (prompt_id, _, text_hash), emb in zip(pending, embeddings):
+        if emb is None:
+            logger.warning("Failed to embed prompt_id=%s", prompt_id)
+            continue
+        items.append((prompt_id, text_hash, emb))
+    if items:
+        store_embeddings(items)
+    return len(items)
+
+
+def queue_embedding(prompt_id: int) -> None:
+    app.state.embed_queue.put_nowait(prompt_id)
+
+
+async def embedding_worker(pending: "asyncio.Queue[int]") -> None:
+    """Embed queued prompt ids in batches so writes never wait on Ollama.
+
+    Ids that pile up while a batch is in flight are coalesced, so several
+    quick edits to one prompt cost a single embedding of its latest text.
+    """
+    while True:
+        batch = {await pending.get()}
+        while len(batch) < EMBED_BATCH_SIZE and not pending.empty():
+            batch.add(pending.get_nowait())
+        try:
+            await embed_prompts(sorted(batch))
+        except Exception:
+            logger.exception("Error embedding prompt_ids=%s", sorted(batch))
+
+
+@app.on_event("startup")
+async def start_embedding_worker() -> None:
+    app.state.embed_queue = asyncio.Queue()
+    app.state.embed_worker = asyncio.create_task(embedding_worker(app.state.embed_queue))
 
 
 class SemanticSearchRequest(BaseModel):
@@ -493,51 +941,59 @@ class SemanticSearchRequest(BaseModel):
 
 
 @app.post("/api/prompts/search/semantic")
-async def semantic_search(payload: SemanticSearchRequest) -> dict[str, Any]:
+async def semantic_search(payload: SemanticSearchRequest) -> FallbackORJSONResponse:
     """Search prompts by semantic similarity using asynchronously fetched embeddings."""
     query_emb = await embed_text(payload.query)
     if query_emb is None:
         raise HTTPException(status_code=503, detail="Embedding service unavailable (Ollama not running?)")
 
-    with closing(get_conn()) as conn:
-        emb_rows = conn.execute("SELECT prompt_id, embedding FROM prompt_embeddings").fetchall()
-        prompt_rows = conn.execute("SELECT * FROM prompts WHERE is_deleted = 0").fetchall()
-        prompt_map = {r["id"]: r for r in prompt_rows}
+    query_vec = normalize(np.asarray(query_emb, dtype=np.float32))
+    with EMB_LOCK:
+        ids, matrix = EMB_IDS, EMB_MATRIX
+    if matrix.shape[1:] != query_vec.shape:
+        return FallbackORJSONResponse({"results": [], "total": 0})
+
+    scores = matrix @ query_vec
+    hits = np.flatnonzero(scores >= payload.min_score)
+    if not hits.size:
+        return FallbackORJSONResponse({"results": [], "total": 0})
+
+    # Partial selection of the best k hits, then sort only those k.
+    hit_scores = scores[hits]
+    k = min(payload.limit, hits.size)
+    best = np.argpartition(-hit_scores, k - 1)[:k]
+    top = hits[best[np.argsort(-hit_scores[best])]]
+
+    top_ids = [int(pid) for pid in ids[top]]
+    placeholders = ", ".join("?" for _ in top_ids)
+    with read_conn() as conn:
+        rows = conn.execute(
+            f"SELECT {PROMPT_COLUMNS} FROM prompts WHERE is_deleted = 0 AND id IN ({placeholders})", top_ids
+        ).fetchall()
+    prompt_map = {r["id"]: r for r in rows}
 
     results = []
-    for row in emb_rows:
-        pid = row["prompt_id"]
+    for pid, score in zip(top_ids, scores[top]):
         if pid not in prompt_map:
             continue
-        stored_emb = unpack_embedding(row["embedding"])
-        score = cosine_similarity(query_emb, stored_emb)
-        if score >= payload.min_score:
-            prompt = row_to_prompt(prompt_map[pid])
-            prompt["score"] = round(score, 4)
-            results.append(prompt)
-
-    results.sort(key=lambda x: x["score"], reverse=True)
-    return {"results": results[: payload.limit], "total": len(results)}
+        prompt = row_to_prompt(prompt_map[pid])
+        prompt["score"] = round(float(score), 4)
+        results.append(prompt)
+    return FallbackORJSONResponse({"results": results, "total": int(hits.size)})
 
 
 @app.post("/api/prompts/embeddings/rebuild", dependencies=[Depends(require_api_key)])
 async def rebuild_embeddings() -> dict[str, Any]:
     """Rebuild all prompt embeddings and report only successful writes as embedded."""
-    with closing(get_conn()) as conn:
-        rows = conn.execute("SELECT * FROM prompts WHERE is_deleted = 0").fetchall()
+    with read_conn() as conn:
+        prompt_ids = [r["id"] for r in conn.execute("SELECT id FROM prompts WHERE is_deleted = 0")]
 
     embedded = 0
-    failed = 0
-    for row in rows:
+    for start in range(0, len(prompt_ids), EMBED_BATCH_SIZE):
+        batch = prompt_ids[start : start + EMBED_BATCH_SIZE]
         try:
-            success = await _embed_prompt(row["id"], row["content"], row["name"], row["tags"], row["category"])
-            if success:
-                embedded += 1
-            else:
-                failed += 1
-                logger.warning("Failed to rebuild embedding for prompt_id=%s", row["id"])
+            embedded += await embed_prompts(batch, force=True)
         except Exception:
-            failed += 1
-            logger.exception("Error rebuilding embedding for prompt_id=%s", row["id"])
+            logger.exception("Error rebuilding embeddings for prompt_ids=%s", batch)
 
-    return {"embedded": embedded, "failed": failed, "total": len(rows)}
+    return {"embedded": embedded, "failed": len(prompt_ids) - embedded, "total": len(prompt_ids)}
@@ -4,225 +4,43 @@ Run this on fresh installs or when no prompts.db exists.
 
 Usage: python seed_demo.py
 """
+import json
 import sqlite3
-import os
 from datetime import datetime
-
-DB_PATH = os.path.join(os.path.dirname(__file__), "prompts.db")
-
-DEMO_PROMPTS = [
-    {
-        "name": "Code Review Checklist",
-        "title": "Code Review Checklist",
-        "category": "development",
-        "tags": '["code-review", "quality", "checklist"]',
-        "content": """# Code Review Checklist
-
-Review the following code for:
-
-## Security
-- Input validation and sanitization
-- Authentication/authorization checks
-- No hardcoded secrets or credentials
-
-## Quality
-- Clear naming conventions
-- DRY principles followed
-- Error handling present
-- Edge cases covered
-
-## Performance
-- No unnecessary loops or allocations
-- Database queries optimized
-- Caching where appropriate
-
-Provide feedback as actionable items with line references.""",
-    },
-    {
-        "name": "API Documentation Generator",
-        "title": "API Documentation Generator",
-        "category": "documentation",
-        "tags": '["api", "docs", "openapi"]',
-        "content": """# API Documentation Generator
-
-Given an API endpoint or codebase, generate documentation including:
-
-1. **Endpoint Summary**: Method, path, description
-2. **Parameters**: Query params, path params, request body schema
-3. **Response**: Status codes, response body schema, examples
-4. **Authentication**: Required auth method
-5. **Error Handling**: Common error responses
-
-Format as OpenAPI-compatible markdown.""",
-    },
-    {
-        "name": "Git Commit Message",
-        "title": "Git Commit Message",
-        "category": "development",
-        "tags": '["git", "commits", "conventional"]',
-        "content": """# Git Commit Message Generator
-
-Write a conventional commit message for the given changes.
-
-Format:
-```
-<type>(<scope>): <subject>
-
-<body>
-```
-
-Types: feat, fix, docs, style, refactor, perf, test, chore
-- Subject: imperative, lowercase, no period, max 50 chars
-- Body: explain what and why (not how), wrap at 72 chars""",
-    },
-    {
-        "name": "Bug Report Template",
-        "title": "Bug Report Template",
-        "category": "project-management",
-        "tags": '["bugs", "reporting", "template"]',
-        "content": """# Bug Report
-
-## Environment
-- OS:
-- Browser/Runtime:
-- Version:
-
-## Description
-Brief description of the issue.
-
-## Steps to Reproduce
-1. Step one
-2. Step two
-3. Step three
-
-## Expected Behavior
-What should happen.
-
-## Actual Behavior
-What actually happens.
-
-## Screenshots/Logs
-Attach relevant evidence.
-
-## Severity
-- [ ] Critical (system down)
-- [ ] High (major feature broken)
-- [ ] Medium (workaround exists)
-- [ ] Low (cosmetic/minor)""",
-    },
-    {
-        "name": "README Scaffold",
-        "title": "README Scaffold",
-        "category": "documentation",
-        "tags": '["readme", "scaffold", "open-source"]',
-        "content": """# Project README Generator
-
-Generate a README.md with:
-
-## Sections
-1. **Title + Badge row** (build, license, version)
-2. **One-line description**
-3. **Screenshot/demo GIF** placeholder
-4. **Features** (bullet list)
-5. **Quick Start** (install + run in <5 steps)
-6. **Configuration** (env vars, config files)
-7. **Architecture** (brief, with diagram placeholder)
-8. **Contributing** (link to CONTRIBUTING.md)
-9. **License**
-
-Keep it scannable. No walls of text.""",
-    },
-    {
-        "name": "Unit Test Generator",
-        "title": "Unit Test Generator",
-        "category": "development",
-        "tags": '["testing", "unit-tests", "tdd"]',
-        "content": """# Unit Test Generator
-
-Given a function or module, generate comprehensive unit tests covering:
-
-1. **Happy path**: Normal expected inputs
-2. **Edge cases**: Empty inputs, boundary values, null/undefined
-3. **Error cases**: Invalid inputs, thrown exceptions
-4. **Type checking**: Wrong types passed to parameters
-
-Use descriptive test names: `should [expected behavior] when [condition]`
-
-Include setup/teardown where needed. Mock external dependencies.""",
-    },
-    {
-        "name": "Security Audit Prompt",
-        "title": "Security Audit Prompt",
-        "category": "security",
-        "tags": '["security", "audit", "vulnerabilities"]',
-        "content": """# Security Audit
-
-Review the provided code/configuration for:
-
-## OWASP Top 10
-- Injection (SQL, XSS, Command)
-- Broken authentication
-- Sensitive data exposure
-- XML external entities
-- Broken access control
-- Security misconfiguration
-- Cross-site scripting
-- Insecure deserialization
-- Known vulnerable components
-- Insufficient logging
-
-## Infrastructure
-- Exposed ports/services
-- Default credentials
-- Unencrypted traffic
-- Missing rate limiting
-
-Rate each finding: Critical / High / Medium / Low / Info""",
-    },
-    {
-        "name": "Database Schema Review",
-        "title": "Database Schema Review",
-        "category": "development",
-        "tags": '["database", "schema", "review"]',
-        "content": """# Database Schema Review
-
-Analyze the provided schema for:
-
-1. **Normalization**: Is it properly normalized? Over-normalized?
-2. **Indexing**: Are queries covered by indexes?
-3. **Naming**: Consistent conventions (snake_case, singular/plural)
-4. **Constraints**: Foreign keys, NOT NULL, CHECK, UNIQUE
-5. **Data Types**: Appropriate sizes, avoiding TEXT for everything
-6. **Scalability**: Will this hold up at 10x, 100x current volume?
-
-Provide recommendations with SQL migration snippets.""",
-    },
-]
-
-
-def seed():
-    db_exists = os.path.exists(DB_PATH)
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    # Create table if needed (matches app.py schema)
-    cur.execute("""
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+DB_PATH = BASE_DIR / "prompts.db"
+
+# Demo prompts go in as one multi-row INSERT (one prepare, one execute)
+# rather than a statement per row. Rows are chunked so no statement binds
+# more than 999 parameters, the limit in SQLite builds before 3.32.
+SQL_INSERT_PROMPTS = "INSERT INTO prompts (name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at) VALUES "
+SQL_PROMPT_ROW = "(?, ?, ?, ?, ?, '[]', 1, 0, ?, ?)"
+PROMPT_ROW_PARAMS = SQL_PROMPT_ROW.count("?")
+MAX_ROWS_PER_INSERT = 999 // PROMPT_ROW_PARAMS
+# Only runs against a table that was empty before the insert, so every row
+# here is a freshly seeded prompt that still needs its version 1 history.
+SQL_INSERT_VERSIONS = """INSERT INTO prompt_versions (prompt_id, version, content, change_note, created_at)
+    SELECT id, 1, content, 'Demo seed', created_at FROM prompts"""
+
+SCHEMA_DDL = {
+    "prompts": """
         CREATE TABLE IF NOT EXISTS prompts (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            name TEXT NOT NULL,
+            name TEXT UNIQUE NOT NULL,
             title TEXT NOT NULL,
-            category TEXT DEFAULT 'general',
-            tags TEXT DEFAULT '[]',
+            category TEXT NOT NULL,
+            tags TEXT NOT NULL DEFAULT '',
             content TEXT NOT NULL,
-            variables TEXT DEFAULT '[]',
-            current_version INTEGER DEFAULT 1,
-            is_deleted INTEGER DEFAULT 0,
-            created_at TEXT,
-            updated_at TEXT
-        )
-    """)
-    
-    cur.execute("""
+            variables TEXT NOT NULL DEFAULT '[]',
+            current_version INTEGER NOT NULL DEFAULT 1,
+            is_deleted INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """,
+    "prompt_versions": """
         CREATE TABLE IF NOT EXISTS prompt_versions (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             prompt_id INTEGER NOT NULL,
@@ -232,27 +50,105 @@ def seed():
             created_at TEXT NOT NULL,
             FOREIGN KEY(prompt_id) REFERENCES prompts(id),
             UNIQUE(prompt_id, version)
-        )
-    """)
+        );
+    """,
+}
 
-    # Only seed if empty
-    count = cur.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
-    if count > 0:
-        print(f"Database already has {count} prompts. Skipping seed.")
-        conn.close()
+# Loaded only when the database is actually empty; see seed().
+DEMO_PROMPTS_PATH = BASE_DIR / "demo_prompts.json"
+
+
+def seed(conn=None):
+    """Seed an empty database with the demo prompts.
+
+    Callers that already hold an open connection can pass it in to reuse
+    its page cache; it is left open and keeps its own PRAGMA settings.
+    """
+    if conn is not None:
+        _seed(conn)
         return
 
-    now = datetime.utcnow().isoformat()
-    for p in DEMO_PROMPTS:
-        cur.execute(
-            """INSERT INTO prompts (name, title, category, tags, content, variables, current_version, is_deleted, created_at, updated_at)
-               VALUES (?, ?, ?, ?, ?, '[]', 1, 0, ?, ?)""",
-            (p["name"], p["title"], p["category"], p["tags"], p["content"], now, now),
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
+    try:
+        # Same settings app.py uses, so the seed writes go through WAL
+        # instead of the default rollback journal with a full sync.
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-64000")
+        _seed(conn)
+    finally:
+        conn.close()
+
+
+def _seed(conn):
+    cur = conn.cursor()
+
+    # A fresh file has no tables; an existing one usually has both, in which
+    # case the CREATE statements can be skipped entirely.
+    existing = {
+        row[0]
+        for row in cur.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('prompts', 'prompt_versions')"
         )
+    }
 
-    conn.commit()
-    conn.close()
-    print(f"Seeded {len(DEMO_PROMPTS)} demo prompts.")
+    # Create tables if needed (matches app.py schema), in one script call.
+    missing = [ddl for name, ddl in SCHEMA_DDL.items() if name not in existing]
+    if missing:
+        cur.executescript("".join(missing))
+
+    # Only seed if empty
+    if "prompts" in existing:
+        count = cur.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
+        if count > 0:
+            print(f"Database already has {count} prompts. Skipping seed.")
+            return
+
+    with open(DEMO_PROMPTS_PATH, encoding="utf-8") as f:
+        demo_prompts = json.load(f)
+
+    now = datetime.utcnow().isoformat()
+    rows = [
+        (p["name"], p["title"], p["category"], ", ".join(p["tags"]), p["content"], now, now)
+        for p in demo_prompts
+    ]
+    # Versions are built from the prompts inserted just before them, so the
+    # foreign key always holds; skip the parent lookup per version row on
+    # connections that enforce it. The pragma is a no-op inside a
+    # transaction, hence the toggle around BEGIN/COMMIT.
+    foreign_keys = cur.execute("PRAGMA foreign_keys").fetchone()[0]
+    if foreign_keys:
+        cur.execute("PRAGMA foreign_keys=OFF")
+    # Secondary indexes app.py created on prompts are cheaper to build once
+    # over the finished table than to maintain row by row. Autoindexes for
+    # UNIQUE constraints have no sql and are left alone. DDL is transactional
+    # in SQLite, so a failed seed rolls the drops back too.
+    indexes = cur.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type='index' AND tbl_name='prompts' AND sql IS NOT NULL"
+    ).fetchall()
+    try:
+        cur.execute("BEGIN")
+        for name, _ in indexes:
+            cur.execute('DROP INDEX "{}"'.format(name.replace('"', '""')))
+        for start in range(0, len(rows), MAX_ROWS_PER_INSERT):
+            chunk = rows[start:start + MAX_ROWS_PER_INSERT]
+            cur.execute(
+                SQL_INSERT_PROMPTS + ", ".join([SQL_PROMPT_ROW] * len(chunk)),
+                [value for row in chunk for value in row],
+            )
+        cur.execute(SQL_INSERT_VERSIONS)
+        for _, sql in indexes:
+            cur.execute(sql)
+        cur.execute("COMMIT")
+    except Exception:
+        if conn.in_transaction:
+            cur.execute("ROLLBACK")
+        raise
+    finally:
+        if foreign_keys:
+            cur.execute("PRAGMA foreign_keys=ON")
+    print(f"Seeded {len(demo_prompts)} demo prompts.")
 
 
 if __name__ == "__main__":